@@ -9,26 +9,42 @@ This module implements an AI edge node for smart farming with:
 - Scheduled detection at specific hours
 """
 
+# Thread tuning must happen before torch/cv2 are imported so their
+# thread pools pick it up. Inference is pinned to INFER_CORES (see
+# _infer_worker), so the compute pools are sized to match: more threads
+# than pinned cores would just timeshare.
+import os
+INFER_CORES = frozenset({2, 3})
+NUM_THREADS = len(INFER_CORES)
+os.environ.setdefault("OMP_NUM_THREADS", str(NUM_THREADS))
+
 # Libs for streaming and threading
 import io
 import logging
+import socket
 import socketserver
 from http import server
-from threading import Condition, Thread
+from threading import Event, Thread
 from picamera2 import Picamera2
 from picamera2.encoders import JpegEncoder
 from picamera2.outputs import FileOutput
 
 # Standard libs
 import requests
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import orjson
+import queue
+import sys
 import time
-import os
-from datetime import datetime
-from ultralytics import YOLO
-import cv2
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import numpy as np
 
+# ultralytics (which pulls in torch) and cv2 are imported lazily in
+# _init_models/detect: they cost seconds and hundreds of MB RSS on a Pi,
+# and paths like setup scripts should not pay for them at import time.
+
 # ==================== Configuration (Defaults) ====================
 TINYIOT_URL = "http://YOUR_SERVER_IP:3000"
 AE_NAME = "TinyFarm"
@@ -36,22 +52,37 @@ RASPI_ORIGIN = "SRaspberryPi_AI"
 SAVE_DIR = "/tmp/minifarm_captures"
 os.makedirs(SAVE_DIR, exist_ok=True)
 STREAMING_PORT = 5000
+CONFIG_CACHE_PATH = os.path.join(SAVE_DIR, "config.json")
+CONFIG_CACHE_TTL_SECONDS = 6 * 3600  # Refresh from the CSE after 6h
+SAVE_RAW_CAPTURES = False  # Debug: archive the unannotated capture each cycle
+JPEG_QUALITY = 85  # Visually equivalent to 100 at ~40% of the encode time/size
+
+# AI Inference Configuration
+MAIN_STREAM_SIZE = (1280, 960)  # YOLO letterboxes to IMG_SIZE anyway; 16MP capture wastes CPU
+IMG_SIZE = 640
+KNOWN_SPECIES = ("basil", "poinsettia")  # Fixed output ordering
 
 # AI Detection Timing Configuration
-TARGET_HOURS = list(range(24))
-CHECK_INTERVAL_SECONDS = 60 * 10  # Check every 10 minutes
+TARGET_HOURS = frozenset(range(24))  # O(1) membership on the schedule checks
 
 # ====================  Streaming Server Classes ====================
 class StreamingOutput(io.BufferedIOBase):
-    """Output buffer for camera frames."""
+    """Latest-frame slot for camera frames.
+
+    Single-writer broadcast: the encoder thread assigns `frame`/`seq`
+    without a lock (pointer assignment is atomic under the GIL) and
+    clients poll the sequence counter, so no per-frame lock acquisitions
+    are needed no matter how many clients are connected.
+    """
     def __init__(self):
         self.frame = None
-        self.condition = Condition()
+        self.seq = 0
+        self.event = Event()
 
     def write(self, buf):
-        with self.condition:
-            self.frame = buf
-            self.condition.notify_all()
+        self.frame = buf
+        self.seq += 1
+        self.event.set()
 
 class StreamingHandler(server.BaseHTTPRequestHandler):
     """HTTP handler for the MJPEG stream."""
@@ -83,19 +114,29 @@ class StreamingHandler(server.BaseHTTPRequestHandler):
             self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
             self.end_headers()
             try:
-                if not StreamingHandler.output_instance:
+                output = StreamingHandler.output_instance
+                if not output:
                     raise Exception("Streaming output not set")
-                
+
+                # Frames go out in one write each; don't let Nagle delay them
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+                last_seen_seq = 0
                 while True:
-                    with StreamingHandler.output_instance.condition:
-                        StreamingHandler.output_instance.condition.wait()
-                        frame = StreamingHandler.output_instance.frame
-                    self.wfile.write(b'--FRAME\r\n')
-                    self.send_header('Content-Type', 'image/jpeg')
-                    self.send_header('Content-Length', len(frame))
-                    self.end_headers()
-                    self.wfile.write(frame)
-                    self.wfile.write(b'\r\n')
+                    if output.seq == last_seen_seq:
+                        # Short timeout: another client's clear() may race
+                        # away our wakeup, so re-check the counter
+                        output.event.wait(timeout=0.5)
+                        output.event.clear()
+                        continue
+                    last_seen_seq = output.seq
+                    frame = output.frame
+                    # Boundary, part headers and JPEG body in a single write
+                    # (one syscall per frame instead of four)
+                    self.wfile.write(
+                        b'--FRAME\r\n'
+                        b'Content-Type: image/jpeg\r\n'
+                        b'Content-Length: %d\r\n\r\n%b\r\n' % (len(frame), frame))
             except Exception as e:
                 logging.warning(
                     'Removed streaming client %s: %s',
@@ -105,16 +146,17 @@ class StreamingHandler(server.BaseHTTPRequestHandler):
             self.end_headers()
 
 # ==================== Helper: oneM2M GET ====================
-def get_latest_cin_json(container_url, origin):
-    """Gets the latest CIN from a container and parses its JSON content."""
+def get_latest_cin_json(session, container_url):
+    """Gets the latest CIN from a container and parses its JSON content.
+
+    `session` carries the oneM2M default headers (Origin/RVI/Accept) and
+    the pooled keep-alive connection.
+    """
     url = f"{container_url}/la"
-    headers = {
-        'X-M2M-Origin': origin, 'X-M2M-RVI': '2a', 'Accept': 'application/json',
-    }
     try:
-        r = requests.get(url, headers=headers, timeout=5)
+        r = session.get(url, timeout=5)
         if r.status_code == 200:
-            cin_data = r.json().get("m2m:cin", {})
+            cin_data = orjson.loads(r.content).get("m2m:cin", {})
             json_content = cin_data.get("con")
             
             if not json_content:
@@ -128,7 +170,7 @@ def get_latest_cin_json(container_url, origin):
             
             # If string, parse it
             print(f"[GET SUCCESS] {url}")
-            return json.loads(json_content)
+            return orjson.loads(json_content)
             
         elif r.status_code == 403:
             print(f"[GET FAIL] {url} - HTTP 403 (Forbidden). Check ACP.")
@@ -142,7 +184,7 @@ def get_latest_cin_json(container_url, origin):
     except requests.exceptions.Timeout:
         print(f"[GET EXCEPTION] {url} - Timeout")
         return None
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         print(f"[GET EXCEPTION] {url} - JSON parse error: {e}")
         return None
     except Exception as e:
@@ -156,9 +198,23 @@ class MiniFarmAI:
         print("=" * 60)
         print("MiniFarm AI Initialize - TR-0071")
         print("=" * 60)
-        
-        self.config = self._load_config_from_cse()
-        
+
+        # One pooled HTTP session for all oneM2M traffic: keep-alive
+        # instead of a TCP handshake per request, plus bounded retries.
+        self._http = requests.Session()
+        self._http.mount("http://", HTTPAdapter(
+            pool_connections=2, pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.2)))
+        self._http.headers.update({
+            'X-M2M-Origin': RASPI_ORIGIN,
+            'X-M2M-RVI': '2a',
+            'Accept': 'application/json',
+        })
+        # Static CIN-create headers; only X-M2M-RI varies per request
+        self._cin_headers = {'Content-Type': 'application/json; ty=4'}
+
+        self.config = self._load_config()
+
         if not self.config:
             print("FATAL ERROR: Failed to load config from CSE.")
             print("Please run 'setup_resources.py' first.")
@@ -171,38 +227,92 @@ class MiniFarmAI:
 
         self._init_camera()
         self._init_models()
-        
+
+        # Single worker keeps JPEG encodes off the detection thread
+        # (cv2.imwrite releases the GIL) while serializing disk writes.
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+
+        # Dedicated inference worker so detection runs decoupled from the
+        # scheduler and the MJPEG encoder; maxsize=1 drops triggers that
+        # arrive while a detection is still running.
+        self._detect_queue = queue.Queue(maxsize=1)
+        self._infer_thread = Thread(target=self._infer_worker, daemon=True)
+        self._infer_thread.start()
+
+
         self.http_server = None
         self.start_streaming_server()
-        
-        self.last_detection_hour = -1
-        
+
+        # Status lines are pointless under systemd; check once, not per loop
+        self._is_tty = sys.stdout.isatty()
+
         print("\nInitialize Complete!\n")
     
+    def _read_config_cache(self):
+        """Returns the cached config dict, or None if missing/corrupt."""
+        try:
+            with open(CONFIG_CACHE_PATH, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+
+    def _load_config(self):
+        """Loads config from the local cache if fresh, else from the CSE.
+
+        Model paths and output URLs rarely change, so a fresh cache lets
+        restarts skip the CSE round-trips entirely; a failed refresh
+        falls back to a stale cache rather than blocking startup.
+        """
+        cached = self._read_config_cache()
+        if cached is not None:
+            age = time.time() - os.path.getmtime(CONFIG_CACHE_PATH)
+            if age < CONFIG_CACHE_TTL_SECONDS:
+                print(f"[CACHE] Using cached config ({age:.0f}s old)")
+                return cached
+
+        config = self._load_config_from_cse()
+        if config:
+            try:
+                with open(CONFIG_CACHE_PATH, 'wb') as f:
+                    f.write(orjson.dumps(config))
+            except OSError as e:
+                print(f"[CACHE] Failed to write config cache: {e}")
+            return config
+
+        if cached is not None:
+            print("[CACHE] CSE refresh failed, falling back to stale cached config")
+            return cached
+        return None
+
     def _load_config_from_cse(self):
         """Loads configuration from oneM2M CSE."""
         print("Loading configuration from oneM2M CSE...")
         deploy_list_path = f"{TINYIOT_URL}/TinyIoT/{AE_NAME}/modelDeploymentList"
         config = {}
         try:
-            # Get Species deployment config
-            deploy_species_url = f"{deploy_list_path}/modelDeploy_species"
-            deploy_species_data = get_latest_cin_json(deploy_species_url, RASPI_ORIGIN)
-            if not deploy_species_data:
-                return None
+            # The species/health pairs are independent of each other, so
+            # fetch each pair in parallel (requests releases the GIL on I/O).
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                # Get deployment configs
+                f_species = pool.submit(get_latest_cin_json, self._http,
+                                        f"{deploy_list_path}/modelDeploy_species")
+                f_health = pool.submit(get_latest_cin_json, self._http,
+                                       f"{deploy_list_path}/modelDeploy_healthy")
+                deploy_species_data = f_species.result()
+                deploy_health_data = f_health.result()
+                if not deploy_species_data or not deploy_health_data:
+                    return None
 
-            # Get Health deployment config
-            deploy_health_url = f"{deploy_list_path}/modelDeploy_healthy"
-            deploy_health_data = get_latest_cin_json(deploy_health_url, RASPI_ORIGIN)
-            if not deploy_health_data:
-                return None
+                # Get model metadata
+                model_species_id_path = deploy_species_data.get("modelID")
+                model_health_id_path = deploy_health_data.get("modelID")
 
-            # Get model metadata
-            model_species_id_path = deploy_species_data.get("modelID")
-            model_health_id_path = deploy_health_data.get("modelID")
-            
-            model_species_data = get_latest_cin_json(f"{TINYIOT_URL}{model_species_id_path}", RASPI_ORIGIN)
-            model_health_data = get_latest_cin_json(f"{TINYIOT_URL}{model_health_id_path}", RASPI_ORIGIN)
+                f_species = pool.submit(get_latest_cin_json, self._http,
+                                        f"{TINYIOT_URL}{model_species_id_path}")
+                f_health = pool.submit(get_latest_cin_json, self._http,
+                                       f"{TINYIOT_URL}{model_health_id_path}")
+                model_species_data = f_species.result()
+                model_health_data = f_health.result()
             
             if not model_species_data or not model_health_data:
                 return None
@@ -228,19 +338,35 @@ class MiniFarmAI:
         print("\n[Camera Init]")
         self.camera = Picamera2()
         config = self.camera.create_video_configuration(
-            main={"size": (4608, 3456)},  # High-res for AI
-            lores={"size": (640, 480)},   # Low-res for streaming
+            # RGB888 is delivered in BGR byte order: 3 channels for YOLO,
+            # matching the BGR drawing/encoding in detect(). The default
+            # XBGR8888 would hand a 4-channel array to the model.
+            main={"size": MAIN_STREAM_SIZE, "format": "RGB888"},  # Mid-res for AI
+            lores={"size": (640, 480)},                           # Low-res for streaming
             buffer_count=2
         )
         self.camera.configure(config)
         self.camera.start()
-        print("Camera started: Main(4608x3456), Lores(640x480)")
+        print(f"Camera started: Main{MAIN_STREAM_SIZE}, Lores(640x480)")
 
     def _init_models(self):
-        """Load YOLO models."""
+        """Load YOLO models (NCNN-exported directory or plain .pt)."""
         print("\n[Model Init]")
+        import cv2
+        cv2.setNumThreads(NUM_THREADS)
+        from ultralytics import YOLO  # Deferred: imports torch
+
         print(f"Loading model: {self.config['model_health_path']}")
-        self.model_main = YOLO(self.config['model_health_path'])
+        # task='detect' is required for exported formats (e.g. *_ncnn_model
+        # directories) where Ultralytics cannot infer the task from the file.
+        self.model_main = YOLO(self.config['model_health_path'], task='detect')
+
+        # Class-id -> species map, built once at load time so detect()
+        # does a dict lookup per box instead of per-label string scans.
+        self._cls_to_species = {
+            cid: self.extract_species_from_label(name)
+            for cid, name in self.model_main.names.items()
+        }
         print("Model loaded successfully")
 
     def start_streaming_server(self):
@@ -259,6 +385,35 @@ class MiniFarmAI:
         thread.start()
         print(f"Streaming server started on port {STREAMING_PORT}")
 
+    def _infer_worker(self):
+        """Consumes detection triggers and runs capture + inference + upload."""
+        try:
+            # Keep inference off the cores serving the camera/streaming
+            # encoder so MJPEG doesn't stutter during detection
+            os.sched_setaffinity(0, INFER_CORES)
+        except (AttributeError, OSError, ValueError):
+            pass  # Fewer than 4 cores, or platform without affinity
+
+        while True:
+            self._detect_queue.get()
+            try:
+                self.detect()
+            except Exception:
+                # Log loudly but keep the worker alive: a dead worker
+                # would silently disable detection for the rest of the run
+                print("[ERROR] Detection cycle failed:")
+                import traceback
+                traceback.print_exc()
+            finally:
+                self._detect_queue.task_done()
+
+    def trigger_detection(self):
+        """Queues a detection run; skips if one is already pending/running."""
+        try:
+            self._detect_queue.put_nowait(True)
+        except queue.Full:
+            print("[SKIP] Detection already in progress")
+
     def extract_species_from_label(self, label):
         """Extract species name from health label."""
         label_lower = label.lower()
@@ -273,80 +428,84 @@ class MiniFarmAI:
         print("\n" + "="*60)
         print("Starting AI Detection")
         print("="*60)
-        
+
+        import cv2  # Already loaded by _init_models; no-op after first call
+
+        # Capture image: the one step where hardware failure is routine
+        # enough to handle (camera busy/disconnected) rather than crash on
+        timestamp_file = datetime.now().strftime('%Y%m%d_%H%M%S')
         try:
-            # Capture high-res image
-            timestamp_file = datetime.now().strftime('%Y%m%d_%H%M%S')
-            raw_path = os.path.join(SAVE_DIR, f"raw_{timestamp_file}.jpg")
-            
             frame_bgr = self.camera.capture_array("main")
-            cv2.imwrite(raw_path, frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, 100])
-            print(f"[CAPTURE] Saved: {raw_path}")
-            
-            # Run inference
-            print("\n[INFERENCE] Running YOLOv8...")
-            results_health = self.model_main(raw_path, conf=0.5, verbose=False)
-            
-            # Process results
-            health_data = {}
-            unique_species_set = set()
-            health_boxes = []
-            
-            detections_health = results_health[0].boxes
-            print(f"[INFERENCE] Detected {len(detections_health)} objects")
-            
-            for i in range(len(detections_health)):
-                box = detections_health.xyxy[i].cpu().numpy().astype(int)
-                health_label = results_health[0].names[int(detections_health.cls[i])]
-                conf = float(detections_health.conf[i])
-                
-                # Fix typos
-                if "poinsenttia" in health_label:
-                    health_label = health_label.replace("poinsenttia", "poinsettia")
-                
-                health_data[str(i)] = health_label
-                health_boxes.append((box, health_label, conf))
-                
-                species = self.extract_species_from_label(health_label)
-                if species != "unknown":
-                    unique_species_set.add(species)
-                
-                print(f"  [{i}] {health_label} (conf: {conf:.2f})")
-            
-            # Create species data
-            species_data = {str(idx): species for idx, species in enumerate(sorted(list(unique_species_set)))}
-            
-            print(f"\n[RESULT] Species: {species_data}")
-            print(f"[RESULT] Health: {health_data}")
-            
-            # Visualize
-            frame_display = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            annotated_frame = frame_display.copy()
-            
-            for box, health_label, conf in health_boxes:
-                x1, y1, x2, y2 = box
-                color = (0, 255, 0) if "healthy" in health_label.lower() else (255, 0, 0)
-                
-                cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
-                label = f"{health_label} {conf:.2f}"
-                cv2.putText(annotated_frame, label, (x1 + 5, y1 - 8), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # Save annotated
-            detection_path = os.path.join(SAVE_DIR, f"detection_{timestamp_file}.jpg")
-            cv2.imwrite(detection_path, cv2.cvtColor(annotated_frame, cv2.COLOR_RGB2BGR), 
-                       [cv2.IMWRITE_JPEG_QUALITY, 100])
-            print(f"[SAVE] Detection saved: {detection_path}")
-            
-            # Send to TinyIoT
-            success = self._send_to_tinyiot(species_data, health_data)
-            return success
-            
         except Exception as e:
-            print(f"[ERROR] Detection failed: {e}")
-            import traceback
-            traceback.print_exc()
+            print(f"[ERROR] Camera capture failed: {e}")
             return False
+
+        if SAVE_RAW_CAPTURES:
+            raw_path = os.path.join(SAVE_DIR, f"raw_{timestamp_file}.jpg")
+            # capture_file encodes JPEG in software (PIL), but it runs on
+            # the I/O worker as a fresh capture request, so the detection
+            # thread pays for neither the encode nor a frame copy.
+            self._io_pool.submit(self.camera.capture_file, raw_path,
+                                 name="main", format='jpeg')
+            print(f"[CAPTURE] Saving: {raw_path}")
+
+        # Inference and post-processing run unwrapped: failures here (bad
+        # model, OOM) should be loud, not silently skipped cycles
+        print("\n[INFERENCE] Running YOLOv8...")
+        results_health = self.model_main(frame_bgr, conf=0.5, imgsz=IMG_SIZE, verbose=False)
+
+        # Process results
+        detections_health = results_health[0].boxes
+        print(f"[INFERENCE] Detected {len(detections_health)} objects")
+
+        # Bulk device->host transfers: one sync per tensor, not per box
+        xyxy = detections_health.xyxy.cpu().numpy().astype(np.int32)
+        cls_ids = detections_health.cls.cpu().numpy().astype(np.int32)
+        confs = detections_health.conf.cpu().numpy()
+
+        names = results_health[0].names
+        # Fix typos across the whole batch
+        labels = [names[int(c)].replace("poinsenttia", "poinsettia") for c in cls_ids]
+
+        health_data = {str(i): label for i, label in enumerate(labels)}
+        health_boxes = list(zip(xyxy, labels, confs))
+
+        unique_species_set = set()
+        for i, label in enumerate(labels):
+            species = self._cls_to_species[int(cls_ids[i])]
+            if species != "unknown":
+                unique_species_set.add(species)
+            print(f"  [{i}] {label} (conf: {confs[i]:.2f})")
+
+        # Create species data: enumerate the fixed species ordering
+        # directly, no sort or intermediate list per detection
+        species_data = {str(idx): species for idx, species in enumerate(
+            s for s in KNOWN_SPECIES if s in unique_species_set)}
+
+        print(f"\n[RESULT] Species: {species_data}")
+        print(f"[RESULT] Health: {health_data}")
+
+        # Visualize: draw in place on the captured frame (the frame is
+        # not reused after this point, so no copy is needed)
+        annotated_frame = frame_bgr
+
+        for box, health_label, conf in health_boxes:
+            x1, y1, x2, y2 = box
+            color = (0, 255, 0) if "healthy" in health_label.lower() else (0, 0, 255)
+
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), color, 3)
+            label = f"{health_label} {conf:.2f}"
+            cv2.putText(annotated_frame, label, (x1 + 5, y1 - 8),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+        # Save annotated
+        detection_path = os.path.join(SAVE_DIR, f"detection_{timestamp_file}.jpg")
+        self._io_pool.submit(cv2.imwrite, detection_path, annotated_frame,
+                             [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        print(f"[SAVE] Detection queued: {detection_path}")
+
+        # Send to TinyIoT (network failures are handled per-POST inside)
+        return self._send_to_tinyiot(species_data, health_data)
     
     def _send_to_tinyiot(self, species_data, health_data):
         """Send detection results to oneM2M server."""
@@ -356,22 +515,21 @@ class MiniFarmAI:
         url_health = self.config['url_health']
         
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        headers = {
-            'X-M2M-Origin': RASPI_ORIGIN, 
-            'X-M2M-RVI': '2a', 
-            'Accept': 'application/json',
-            'Content-Type': 'application/json; ty=4', 
-            'X-M2M-RI': 'create_cin_' + str(time.time()),
-        }
         all_success = True
         
         # Send species
         if species_data:
             species_with_timestamp = {"timestamp": timestamp, "data": species_data}
-            json_string = json.dumps(species_with_timestamp)
+            json_string = orjson.dumps(species_with_timestamp).decode()
             payload = {"m2m:cin": {"con": "data", "lbl": [json_string]}}
             try:
-                r = requests.post(url_species, headers=headers, json=payload, timeout=10)
+                # Origin/RVI/Accept come from the session defaults;
+                # monotonic_ns gives a cheap, unique request ID. The body
+                # goes through orjson too (json= would use stdlib json).
+                headers = {**self._cin_headers,
+                           'X-M2M-RI': f"create_cin_{time.monotonic_ns()}"}
+                r = self._http.post(url_species, headers=headers,
+                                    data=orjson.dumps(payload), timeout=10)
                 if r.status_code == 201:
                     print(f"[SUCCESS] Species uploaded")
                 else:
@@ -384,12 +542,13 @@ class MiniFarmAI:
         # Send health
         if health_data:
             health_with_timestamp = {"timestamp": timestamp, "data": health_data}
-            json_string = json.dumps(health_with_timestamp)
+            json_string = orjson.dumps(health_with_timestamp).decode()
             payload = {"m2m:cin": {"con": "data", "lbl": [json_string]}}
             try:
-                headers_health = headers.copy()
-                headers_health['X-M2M-RI'] = 'create_cin_' + str(time.time() + 1)
-                r = requests.post(url_health, headers=headers_health, json=payload, timeout=10)
+                headers = {**self._cin_headers,
+                           'X-M2M-RI': f"create_cin_{time.monotonic_ns()}"}
+                r = self._http.post(url_health, headers=headers,
+                                    data=orjson.dumps(payload), timeout=10)
                 if r.status_code == 201:
                     print(f"[SUCCESS] Health uploaded")
                 else:
@@ -403,37 +562,52 @@ class MiniFarmAI:
             print("[UPLOAD] All data sent successfully")
         return all_success
     
+    def _seconds_until_next_target(self, now):
+        """Seconds from `now` until the start of the next hour in TARGET_HOURS."""
+        top_of_hour = now.replace(minute=0, second=0, microsecond=0)
+        for offset in range(1, 25):
+            candidate = top_of_hour + timedelta(hours=offset)
+            if candidate.hour in TARGET_HOURS:
+                return (candidate - now).total_seconds()
+        return None
+
     def run(self):
-        """Main loop: Check time and run detection at TARGET_HOURS."""
+        """Main loop: Sleep until each TARGET_HOURS boundary and run detection."""
         print("\n" + "="*60)
         print("Real-time Monitoring Started")
-        print(f"AI Detection Schedule: {TARGET_HOURS}")
-        print(f"Check Interval: {CHECK_INTERVAL_SECONDS}s")
+        print(f"AI Detection Schedule: {sorted(TARGET_HOURS)}")
         print("="*60 + "\n")
-        
+
         try:
+            # Run immediately if the current hour is scheduled
+            now = datetime.now()
+            if now.hour in TARGET_HOURS:
+                print(f"\n[Target Hour {now.hour}:00] Running AI Detection...")
+                self.trigger_detection()
+
+            # One wakeup per scheduled detection instead of polling
             while True:
                 now = datetime.now()
-                current_hour = now.hour
+                sleep_seconds = self._seconds_until_next_target(now)
+                if sleep_seconds is None:
+                    print("No target hours configured. Stopping monitor loop.")
+                    break
 
-                if current_hour in TARGET_HOURS and current_hour != self.last_detection_hour:
-                    print(f"\n[Target Hour {current_hour}:00] Running AI Detection...")
-                    self.detect()
-                    self.last_detection_hour = current_hour
-                    print(f"\nDetection complete. Waiting for next check...")
+                if self._is_tty:
+                    print(f"Next detection in {sleep_seconds:.0f}s. Sleeping...")
+                time.sleep(sleep_seconds)
+
+                now = datetime.now()
+                print(f"\n[Target Hour {now.hour}:00] Running AI Detection...")
+                self.trigger_detection()
 
-                else:
-                    if current_hour != self.last_detection_hour:
-                        self.last_detection_hour = -1
-                    
-                    print(f"Time: {now.strftime('%H:%M:%S')}. Next check in {CHECK_INTERVAL_SECONDS}s...", end='\r')
-                
-                time.sleep(CHECK_INTERVAL_SECONDS)
-                
         except KeyboardInterrupt:
             print("\n\nProgram Terminated (Ctrl+C)")
         
         finally:
+            print("Flushing pending image writes...")
+            self._io_pool.shutdown(wait=True)
+
             print("Stopping camera...")
             self.camera.stop_encoder()
             self.camera.stop()
@@ -448,8 +622,6 @@ class MiniFarmAI:
 
 # ==================== Main ====================
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1:
         if sys.argv[1] == "test_camera":
             print("\n=== Camera Test Mode ===")
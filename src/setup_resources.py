@@ -7,7 +7,9 @@ for dynamic AI model deployment in smart farming applications.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # ==================== Configuration ====================
 TINYIOT_URL = "http://YOUR_SERVER_IP:3000"
@@ -22,23 +24,37 @@ INFERENCE_PATH = f"{AE_PATH}/inference"
 ADMIN_ORIGIN = "SRaspberryPi_AI"
 ACP_NAME = "acp_pi_full_access"
 
+# Shared session: one keep-alive connection pool for all setup traffic
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+# Static header templates per resource type; per-call additions are just
+# X-M2M-Origin and X-M2M-RI
+BASE_HEADERS = {'X-M2M-RVI': '2a', 'Accept': 'application/json'}
+HEADERS_TY1 = {**BASE_HEADERS, 'Content-Type': 'application/json; ty=1'}
+HEADERS_TY2 = {**BASE_HEADERS, 'Content-Type': 'application/json; ty=2'}
+HEADERS_TY3 = {**BASE_HEADERS, 'Content-Type': 'application/json; ty=3'}
+HEADERS_TY4 = {**BASE_HEADERS, 'Content-Type': 'application/json; ty=4'}
+
 # ==================== Data Definitions ====================
+# Model paths point at NCNN-exported directories (see export_model.py);
+# Ultralytics dispatches the NCNN runtime automatically on load.
 ML_MODEL_SPECIES_DATA = {
     "name": "species-detector",
     "version": "v1.0",
-    "platform": "Ultralytics/PyTorch",
+    "platform": "Ultralytics/NCNN",
     "description": "Plant species detection (basil, poinsettia)",
     "mlModelURL": "",
-    "mlModelPath": "/home/seslab/minifarm/best.pt"
+    "mlModelPath": "/home/seslab/minifarm/best_ncnn_model"
 }
 
 ML_MODEL_HEALTH_DATA = {
     "name": "health-species-detector",
     "version": "v2.1",
-    "platform": "Ultralytics/PyTorch",
+    "platform": "Ultralytics/NCNN",
     "description": "Health+Species detection (healthy_basil, etc.)",
     "mlModelURL": "",
-    "mlModelPath": "/home/seslab/minifarm/last.pt"
+    "mlModelPath": "/home/seslab/minifarm/last_ncnn_model"
 }
 
 DEPLOY_SPECIES_DATA = {
@@ -59,13 +75,7 @@ DEPLOY_HEALTHY_DATA = {
 
 def create_ae(parent_url, ae_name, origin):
     """Creates an Application Entity (AE) resource (ty=2)."""
-    headers = {
-        'X-M2M-Origin': origin,
-        'X-M2M-RVI': '2a',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json; ty=2',
-        'X-M2M-RI': f"create_ae_{ae_name}",
-    }
+    headers = {**HEADERS_TY2, 'X-M2M-Origin': origin, 'X-M2M-RI': f"create_ae_{ae_name}"}
     payload = {
         "m2m:ae": {
             "rn": ae_name,
@@ -75,7 +85,7 @@ def create_ae(parent_url, ae_name, origin):
     }
     
     try:
-        r = requests.post(parent_url, headers=headers, json=payload, timeout=5)
+        r = SESSION.post(parent_url, headers=headers, json=payload, timeout=5)
         if r.status_code == 201:
             print(f"[SUCCESS] AE '{ae_name}' created")
             return True
@@ -92,16 +102,12 @@ def create_ae(parent_url, ae_name, origin):
 def create_or_update_acp(parent_url, acp_name, origin_id, origin):
     """Creates or retrieves Access Control Policy (ACP) and returns resource ID."""
     print(f"\n[ACP] Checking/Creating ACP '{acp_name}'...")
-    check_headers = {
-        'X-M2M-Origin': origin,
-        'X-M2M-RVI': '2a',
-        'Accept': 'application/json'
-    }
-    
+    check_headers = {**BASE_HEADERS, 'X-M2M-Origin': origin}
+
     # Check if ACP already exists
     try:
         check_url = f"{parent_url}/{acp_name}"
-        r_check = requests.get(check_url, headers=check_headers, timeout=5)
+        r_check = SESSION.get(check_url, headers=check_headers, timeout=5)
         if r_check.status_code == 200:
             ri = r_check.json().get("m2m:acp", {}).get("ri")
             print(f"[INFO] ACP '{acp_name}' already exists, ri: {ri}")
@@ -110,14 +116,8 @@ def create_or_update_acp(parent_url, acp_name, origin_id, origin):
         pass
     
     # Create new ACP
-    headers = {
-        'X-M2M-Origin': origin,
-        'X-M2M-RVI': '2a',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json; ty=1',
-        'X-M2M-RI': f"create_acp_{acp_name}",
-    }
-    
+    headers = {**HEADERS_TY1, 'X-M2M-Origin': origin, 'X-M2M-RI': f"create_acp_{acp_name}"}
+
     # acop: 63 = All permissions (Create, Retrieve, Update, Delete, Notify, Discover)
     access_rule = {"acop": 63, "acor": [origin_id]}
     payload = {
@@ -129,13 +129,13 @@ def create_or_update_acp(parent_url, acp_name, origin_id, origin):
     }
     
     try:
-        r = requests.post(parent_url, headers=headers, json=payload, timeout=5)
+        r = SESSION.post(parent_url, headers=headers, json=payload, timeout=5)
         if r.status_code == 201:
             ri = r.json().get("m2m:acp", {}).get("ri")
             print(f"[SUCCESS] ACP '{acp_name}' created, ri: {ri}")
             return ri
         elif r.status_code == 409:
-            r_get = requests.get(f"{parent_url}/{acp_name}", headers=check_headers, timeout=5)
+            r_get = SESSION.get(f"{parent_url}/{acp_name}", headers=check_headers, timeout=5)
             if r_get.status_code == 200:
                 ri = r_get.json().get("m2m:acp", {}).get("ri")
                 print(f"[INFO] ACP '{acp_name}' already exists, ri: {ri}")
@@ -149,14 +149,8 @@ def create_or_update_acp(parent_url, acp_name, origin_id, origin):
 
 def create_container(parent_url, container_name, origin, acp_ri_list=None):
     """Creates a Container (CNT) resource (ty=3)."""
-    headers = {
-        'X-M2M-Origin': origin,
-        'X-M2M-RVI': '2a',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json; ty=3',
-        'X-M2M-RI': f"create_cnt_{container_name}",
-    }
-    
+    headers = {**HEADERS_TY3, 'X-M2M-Origin': origin, 'X-M2M-RI': f"create_cnt_{container_name}"}
+
     container_payload = {"rn": container_name}
     if acp_ri_list:
         container_payload["acpi"] = acp_ri_list
@@ -165,7 +159,7 @@ def create_container(parent_url, container_name, origin, acp_ri_list=None):
     payload = {"m2m:cnt": container_payload}
     
     try:
-        r = requests.post(parent_url, headers=headers, json=payload, timeout=5)
+        r = SESSION.post(parent_url, headers=headers, json=payload, timeout=5)
         if r.status_code == 201:
             print(f"[SUCCESS] Container '{container_name}' created")
             return True
@@ -181,14 +175,9 @@ def create_container(parent_url, container_name, origin, acp_ri_list=None):
 
 def create_content_instance(container_url, data_dict, origin):
     """Creates a Content Instance (CIN) with JSON content (ty=4)."""
-    headers = {
-        'X-M2M-Origin': origin,
-        'X-M2M-RVI': '2a',
-        'Accept': 'application/json',
-        'Content-Type': 'application/json; ty=4',
-        'X-M2M-RI': f"create_cin_{container_url.split('/')[-1]}",
-    }
-    
+    headers = {**HEADERS_TY4, 'X-M2M-Origin': origin,
+               'X-M2M-RI': f"create_cin_{container_url.split('/')[-1]}"}
+
     json_string = json.dumps(data_dict)
     payload = {
         "m2m:cin": {
@@ -198,7 +187,7 @@ def create_content_instance(container_url, data_dict, origin):
     }
     
     try:
-        r = requests.post(container_url, headers=headers, json=payload, timeout=5)
+        r = SESSION.post(container_url, headers=headers, json=payload, timeout=5)
         if r.status_code == 201:
             print(f"[SUCCESS] CIN created")
             print(f"  Data: {json_string[:60]}...")
@@ -240,21 +229,22 @@ def main():
         print("Failed to create modelDeploymentList. Stopping.")
         return
 
-    # Step 3: Create model metadata in modelRepo
-    print("\n[Step 2] Setting up modelRepo...")
-    if create_container(REPO_PATH, "mlModel-species", ADMIN_ORIGIN, acp_ri_list):
-        create_content_instance(f"{REPO_PATH}/mlModel-species", ML_MODEL_SPECIES_DATA, ADMIN_ORIGIN)
-    
-    if create_container(REPO_PATH, "mlModel-health", ADMIN_ORIGIN, acp_ri_list):
-        create_content_instance(f"{REPO_PATH}/mlModel-health", ML_MODEL_HEALTH_DATA, ADMIN_ORIGIN)
+    # Steps 3+4: Model metadata and deployment configs target different
+    # parents, so the four container+CIN chains can run in parallel
+    def setup_resource(parent_path, name, data):
+        if create_container(parent_path, name, ADMIN_ORIGIN, acp_ri_list):
+            create_content_instance(f"{parent_path}/{name}", data, ADMIN_ORIGIN)
 
-    # Step 4: Create deployment configurations
-    print(f"\n[Step 3] Creating deployment configurations...")
-    if create_container(DEPLOY_LIST_PATH, "modelDeploy_species", ADMIN_ORIGIN, acp_ri_list):
-        create_content_instance(f"{DEPLOY_LIST_PATH}/modelDeploy_species", DEPLOY_SPECIES_DATA, ADMIN_ORIGIN)
-    
-    if create_container(DEPLOY_LIST_PATH, "modelDeploy_healthy", ADMIN_ORIGIN, acp_ri_list):
-        create_content_instance(f"{DEPLOY_LIST_PATH}/modelDeploy_healthy", DEPLOY_HEALTHY_DATA, ADMIN_ORIGIN)
+    print("\n[Step 2+3] Creating modelRepo and deployment configurations...")
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [
+            pool.submit(setup_resource, REPO_PATH, "mlModel-species", ML_MODEL_SPECIES_DATA),
+            pool.submit(setup_resource, REPO_PATH, "mlModel-health", ML_MODEL_HEALTH_DATA),
+            pool.submit(setup_resource, DEPLOY_LIST_PATH, "modelDeploy_species", DEPLOY_SPECIES_DATA),
+            pool.submit(setup_resource, DEPLOY_LIST_PATH, "modelDeploy_healthy", DEPLOY_HEALTHY_DATA),
+        ]
+        for f in futures:
+            f.result()
 
     # Step 5: Create inference output containers
     print(f"\n[Step 4] Creating inference output containers...")